@@ -2,11 +2,23 @@
 """Generate a November concrete mix report from LineItems tabs."""
 
 import argparse
+import contextlib
 import csv
-import glob
+import hashlib
+import io
+import json
 import os
+import posixpath
+import re
 import sys
-from collections import defaultdict
+import zipfile
+from array import array
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import datetime, time, timedelta
+from functools import lru_cache, partial
+from itertools import repeat
+from operator import itemgetter
+from xml.etree import ElementTree
 
 DEFAULT_INPUT_DIR = (
     "/Users/devinhayward/Library/CloudStorage/OneDrive-Personal/"
@@ -28,6 +40,65 @@ REQUIRED_COLUMNS = [
     "Ticket No.",
 ]
 
+LINE_ITEMS_SHEET = "LineItems"
+
+CSV_BUFFER_SIZE = 1 << 18
+
+# Bump when the reader or the cached row layout changes so stale entries
+# are ignored instead of misread.
+CACHE_VERSION = 3
+
+CACHE_CELL_TYPES = frozenset(
+    (type(None), str, int, float, bool, datetime, time, timedelta)
+)
+
+COUNTER_NAMES = [
+    "processed_files",
+    "included_main",
+    "included_additional",
+    "skipped_desc",
+    "skipped_qty",
+]
+
+SHEET_NS = "{http://schemas.openxmlformats.org/spreadsheetml/2006/main}"
+REL_NS = "{http://schemas.openxmlformats.org/officeDocument/2006/relationships}"
+PACKAGE_REL_NS = "{http://schemas.openxmlformats.org/package/2006/relationships}"
+
+EXCEL_EPOCH = datetime(1899, 12, 30)
+MAC_EXCEL_EPOCH = datetime(1904, 1, 1)
+
+# Built-in number formats that are dates or times; every other built-in id
+# is numeric. Workbooks only spell out the codes of custom formats.
+BUILTIN_DATE_FORMATS = {
+    14: "mm-dd-yy",
+    15: "d-mmm-yy",
+    16: "d-mmm",
+    17: "mmm-yy",
+    18: "h:mm AM/PM",
+    19: "h:mm:ss AM/PM",
+    20: "h:mm",
+    21: "h:mm:ss",
+    22: "m/d/yy h:mm",
+    45: "mm:ss",
+    46: "[h]:mm:ss",
+    47: "mmss.0",
+}
+
+# Same classification rules as openpyxl.styles.numbers: quoted literals and
+# bracketed locale/colour tags are ignored, [h]/[m]/[s] mean elapsed time.
+FORMAT_LITERAL_RE = re.compile(r'".*?"|\[(?!hh?\]|mm?\]|ss?\])[^\]]*\]')
+DATE_CODE_RE = re.compile(r"(?<![_\\])[dmhysDMHYS]")
+ELAPSED_FORMAT_RE = re.compile(
+    r"\[hh?\](:mm(:ss(\.0*)?)?)?|\[mm?\](:ss(\.0*)?)?|\[ss?\](\.0*)?", re.IGNORECASE
+)
+
+
+def positive_int(text):
+    value = int(text)
+    if value < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, got {value}")
+    return value
+
 
 def parse_args() -> argparse.Namespace:
     parser = argparse.ArgumentParser(
@@ -43,22 +114,35 @@ def parse_args() -> argparse.Namespace:
         default=None,
         help="Output CSV path (default: <input>/Nov_Report.csv)",
     )
+    parser.add_argument(
+        "--jobs",
+        type=positive_int,
+        default=os.cpu_count() or 1,
+        help="Number of workbooks to parse in parallel (default: CPU count)",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Re-read every workbook instead of using cached LineItems rows",
+    )
     return parser.parse_args()
 
 
 def parse_number(value):
-    if value is None:
-        return None
-    if isinstance(value, (int, float)):
+    # Exact type checks cover nearly every cell; float() already ignores
+    # surrounding whitespace and rejects blank strings.
+    value_type = type(value)
+    if value_type is float:
+        return value
+    if value_type is int:
         return float(value)
-    if isinstance(value, str):
-        stripped = value.strip()
-        if not stripped:
-            return None
+    if value_type is str:
         try:
-            return float(stripped.replace(",", ""))
+            return float(value.replace(",", ""))
         except ValueError:
             return None
+    if isinstance(value, (int, float)):
+        return float(value)
     return None
 
 
@@ -68,7 +152,7 @@ def normalize_text(value, fallback="Unknown"):
     if isinstance(value, str):
         trimmed = value.strip()
         return trimmed if trimmed else fallback
-    return str(value)
+    return str(value).strip()
 
 
 def normalize_level(value):
@@ -84,11 +168,6 @@ def normalize_level(value):
     return str(value)
 
 
-def format_number(value):
-    if value is None:
-        return ""
-    return f"{value:.2f}"
-
 def level_sort_key(value):
     numeric = parse_number(value)
     if numeric is not None:
@@ -96,130 +175,678 @@ def level_sort_key(value):
     return (1, str(value))
 
 
-def load_line_items(path):
-    try:
-        from openpyxl import load_workbook
-    except ImportError:
-        print(
-            "Missing dependency: openpyxl. Install with 'pip install openpyxl'.",
-            file=sys.stderr,
-        )
-        sys.exit(1)
+# Item Type, Description, Qty Unit, Location and Level repeat across
+# thousands of rows, so their normalization is memoized per cell value.
+# typed=True keeps 1, 1.0 and True apart since they render differently.
+# Results are interned so equal group-key parts share one string object,
+# which saves memory and lets key lookups match on identity.
+@lru_cache(maxsize=8192, typed=True)
+def cached_normalize_text(value, fallback="Unknown"):
+    return sys.intern(normalize_text(value, fallback))
+
+
+@lru_cache(maxsize=8192, typed=True)
+def cached_normalize_level(value):
+    return sys.intern(normalize_level(value))
+
+
+cached_level_sort_key = lru_cache(maxsize=8192, typed=True)(level_sort_key)
+
+
+def column_index(ref):
+    index = 0
+    for char in ref:
+        if not char.isalpha():
+            break
+        index = index * 26 + (ord(char.upper()) - 64)
+    return index - 1
+
+
+def cast_number(text):
+    if "." in text or "E" in text or "e" in text:
+        return float(text)
+    return int(text)
+
+
+def excel_datetime(number, epoch):
+    # Mirrors openpyxl: fractions under a day are times of day, and the
+    # 1900 system keeps Excel's phantom 1900-02-29 for serials below 60.
+    day, fraction = divmod(number, 1)
+    diff = timedelta(milliseconds=round(fraction * 86400000))
+    if 0 <= number < 1 and diff.days == 0:
+        return (datetime.min + diff).time()
+    if 0 < number < 60 and epoch == EXCEL_EPOCH:
+        day += 1
+    return epoch + timedelta(days=day) + diff
+
+
+def excel_timedelta(number):
+    return timedelta(milliseconds=round(number * 86400000))
 
-    workbook = load_workbook(path, read_only=True, data_only=True)
-    if "LineItems" not in workbook.sheetnames:
-        print(f"Skipping {os.path.basename(path)}: no LineItems sheet", file=sys.stderr)
-        return []
-    sheet = workbook["LineItems"]
-    rows = sheet.iter_rows(values_only=True)
-    header = next(rows, None)
-    if header is None:
-        print(f"Skipping {os.path.basename(path)}: empty LineItems", file=sys.stderr)
-        return []
 
-    header_map = {}
-    for idx, name in enumerate(header):
-        if name is None:
+def read_relationships(archive, part):
+    # Maps relationship id -> (type, target part) for the given package part;
+    # part "" is the package itself, whose relationships are _rels/.rels.
+    folder, name = posixpath.split(part)
+    rels_part = posixpath.join(folder, "_rels", f"{name}.rels")
+    rels = ElementTree.fromstring(archive.read(rels_part))
+    relationships = {}
+    for rel in rels.iter(f"{PACKAGE_REL_NS}Relationship"):
+        target = rel.get("Target", "")
+        if target.startswith("/"):
+            target = target.lstrip("/")
+        else:
+            target = posixpath.normpath(posixpath.join(folder, target))
+        relationships[rel.get("Id")] = (rel.get("Type", ""), target)
+    return relationships
+
+
+def find_related_part(relationships, rel_type):
+    for found_type, target in relationships.values():
+        if found_type.endswith(rel_type):
+            return target
+    return None
+
+
+def find_workbook_parts(archive, sheet_name):
+    """Locate the parts needed to read one sheet of a workbook.
+
+    Returns (sheet_path, shared_strings_path, styles_path, epoch) with
+    sheet_path None when the sheet does not exist. Raises KeyError when a
+    part the workbook points at is missing from the archive.
+    """
+    workbook_part = find_related_part(read_relationships(archive, ""), "/officeDocument")
+    if workbook_part is None:
+        raise KeyError("no officeDocument relationship")
+    workbook = ElementTree.fromstring(archive.read(workbook_part))
+    relationships = read_relationships(archive, workbook_part)
+
+    properties = workbook.find(f"{SHEET_NS}workbookPr")
+    date1904 = properties is not None and properties.get("date1904") in ("1", "true")
+    epoch = MAC_EXCEL_EPOCH if date1904 else EXCEL_EPOCH
+
+    sheet_path = None
+    for sheet in workbook.iter(f"{SHEET_NS}sheet"):
+        if sheet.get("name") == sheet_name:
+            relationship = relationships.get(sheet.get(f"{REL_NS}id"))
+            if relationship is not None:
+                sheet_path = relationship[1]
+            break
+    return (
+        sheet_path,
+        find_related_part(relationships, "/sharedStrings"),
+        find_related_part(relationships, "/styles"),
+        epoch,
+    )
+
+
+def rich_text(element):
+    # Phonetic runs (rPh) are annotations, not part of the cell text.
+    parts = []
+    for child in element:
+        if child.tag == f"{SHEET_NS}t":
+            parts.append(child.text or "")
+        elif child.tag == f"{SHEET_NS}r":
+            for run_text in child.iter(f"{SHEET_NS}t"):
+                parts.append(run_text.text or "")
+    return "".join(parts)
+
+
+def load_shared_strings(archive, part):
+    if part is None:
+        return []
+    strings = []
+    with archive.open(part) as handle:
+        for _, element in ElementTree.iterparse(handle, events=("end",)):
+            if element.tag == f"{SHEET_NS}si":
+                strings.append(rich_text(element))
+                element.clear()
+    return strings
+
+
+def is_elapsed_format(code):
+    return ELAPSED_FORMAT_RE.match(code.split(";")[0]) is not None
+
+
+def is_date_format(code):
+    section = FORMAT_LITERAL_RE.sub("", code.split(";")[0])
+    return DATE_CODE_RE.search(section) is not None
+
+
+def load_date_styles(archive, part, epoch):
+    # Maps a cell's style index (the raw "s" attribute) to the converter for
+    # its date or elapsed-time number format, the way openpyxl reads them.
+    if part is None:
+        return {}
+    styles = ElementTree.fromstring(archive.read(part))
+    formats = dict(BUILTIN_DATE_FORMATS)
+    num_fmts = styles.find(f"{SHEET_NS}numFmts")
+    if num_fmts is not None:
+        for fmt in num_fmts.iter(f"{SHEET_NS}numFmt"):
+            formats[int(fmt.get("numFmtId"))] = fmt.get("formatCode", "")
+
+    date_styles = {}
+    cell_xfs = styles.find(f"{SHEET_NS}cellXfs")
+    if cell_xfs is None:
+        return date_styles
+    for idx, xf in enumerate(cell_xfs.iter(f"{SHEET_NS}xf")):
+        code = formats.get(int(xf.get("numFmtId", "0")))
+        if not code:
             continue
-        key = str(name).strip()
-        if key and key not in header_map:
-            header_map[key] = idx
-
-    missing = [col for col in REQUIRED_COLUMNS if col not in header_map]
-    if missing:
-        print(
-            f"Skipping {os.path.basename(path)}: missing columns {missing}",
-            file=sys.stderr,
+        if is_elapsed_format(code):
+            date_styles[str(idx)] = excel_timedelta
+        elif is_date_format(code):
+            date_styles[str(idx)] = partial(excel_datetime, epoch=epoch)
+    return date_styles
+
+
+def cell_value(cell, shared_strings, date_styles):
+    cell_type = cell.get("t", "n")
+    if cell_type == "inlineStr":
+        inline = cell.find(f"{SHEET_NS}is")
+        return rich_text(inline) if inline is not None else None
+
+    value = cell.find(f"{SHEET_NS}v")
+    if value is None or value.text is None:
+        return None
+    text = value.text
+    if cell_type == "s":
+        return shared_strings[int(text)]
+    if cell_type == "b":
+        return text != "0"
+    if cell_type == "n":
+        try:
+            number = cast_number(text)
+        except ValueError:
+            return text
+        convert = date_styles.get(cell.get("s"))
+        if convert is None:
+            return number
+        try:
+            return convert(number)
+        except (OverflowError, ValueError):
+            return number
+    if cell_type == "d":
+        try:
+            return datetime.fromisoformat(text)
+        except ValueError:
+            return text
+    # "str" (formula result) and "e" (error) stay as text.
+    return text
+
+
+def iter_sheet_rows(archive, sheet_path, shared_strings, date_styles, max_col=None):
+    # Rows are cleared from sheetData as soon as they are yielded so memory
+    # stays flat regardless of sheet size; start events are only used to
+    # find sheetData. With max_col set, every row is exactly max_col wide:
+    # cells past it (formatting-only "ghost" columns) are never decoded and
+    # short rows are padded with None.
+    row_tag = f"{SHEET_NS}row"
+    sheet_data_tag = f"{SHEET_NS}sheetData"
+    sheet_data = None
+    with archive.open(sheet_path) as handle:
+        for event, element in ElementTree.iterparse(handle, events=("start", "end")):
+            if event == "start":
+                if element.tag == sheet_data_tag:
+                    sheet_data = element
+                continue
+            if element.tag != row_tag:
+                continue
+
+            values = [] if max_col is None else [None] * max_col
+            col = 0
+            for cell in element.iter(f"{SHEET_NS}c"):
+                ref = cell.get("r")
+                idx = column_index(ref) if ref else col
+                col = idx + 1
+                if max_col is not None:
+                    if idx >= max_col:
+                        continue
+                elif idx >= len(values):
+                    values.extend([None] * (idx + 1 - len(values)))
+                values[idx] = cell_value(cell, shared_strings, date_styles)
+            yield tuple(values)
+
+            if sheet_data is not None:
+                sheet_data.clear()
+            else:
+                element.clear()
+
+
+def load_line_items(path, source=None):
+    # source, when given, is an already-read copy of the workbook (see
+    # fetch_workbook); path is still used for messages.
+    with zipfile.ZipFile(path if source is None else source) as archive:
+        try:
+            sheet_path, strings_part, styles_part, epoch = find_workbook_parts(
+                archive, LINE_ITEMS_SHEET
+            )
+            if sheet_path is None:
+                print(
+                    f"Skipping {os.path.basename(path)}: no LineItems sheet",
+                    file=sys.stderr,
+                )
+                return [], None
+            shared_strings = load_shared_strings(archive, strings_part)
+            date_styles = load_date_styles(archive, styles_part, epoch)
+
+            header_rows = iter_sheet_rows(archive, sheet_path, shared_strings, date_styles)
+            try:
+                header = next(header_rows, None)
+            finally:
+                header_rows.close()
+        except KeyError as exc:
+            print(
+                f"Skipping {os.path.basename(path)}: unreadable workbook ({exc.args[0]})",
+                file=sys.stderr,
+            )
+            return [], None
+        if header is None:
+            print(f"Skipping {os.path.basename(path)}: empty LineItems", file=sys.stderr)
+            return [], None
+
+        header_map = {}
+        for idx, name in enumerate(header):
+            if name is None:
+                continue
+            key = str(name).strip()
+            if key and key not in header_map:
+                header_map[key] = idx
+
+        missing = [col for col in REQUIRED_COLUMNS if col not in header_map]
+        if missing:
+            print(
+                f"Skipping {os.path.basename(path)}: missing columns {missing}",
+                file=sys.stderr,
+            )
+            return [], None
+
+        # Only the required columns are decoded from the data rows. Rows that
+        # are blank across all of them (often thousands of formatted-but-empty
+        # rows at the bottom of a sheet) are dropped before any parsing.
+        col_indices = tuple(header_map[col] for col in REQUIRED_COLUMNS)
+        width = max(col_indices) + 1
+        rows = iter_sheet_rows(
+            archive, sheet_path, shared_strings, date_styles, max_col=width
         )
-        return []
+        next(rows, None)
+        blank = (None,) * width
+        return [row for row in rows if row != blank], col_indices
 
-    items = []
-    for row in rows:
-        if row is None:
-            continue
-        items.append((row, header_map))
-    return items
 
+def default_cache_dir():
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(
+        os.path.expanduser("~"), ".cache"
+    )
+    return os.path.join(base, "nov_report")
+
+
+def cache_path(cache_dir, path):
+    # One entry per workbook path, so a changed workbook overwrites its old
+    # entry; the freshness stamp lives inside the entry.
+    digest = hashlib.blake2b(
+        os.path.abspath(path).encode("utf-8"), digest_size=8
+    ).hexdigest()
+    return os.path.join(cache_dir, f"{digest}.json")
+
+
+def cache_stamp(path):
+    stat = os.stat(path)
+    return [CACHE_VERSION, stat.st_mtime_ns, stat.st_size]
+
+
+def encode_cell(value):
+    # json.dump hook for the date and time values the reader can produce.
+    if isinstance(value, datetime):
+        return {"datetime": value.isoformat()}
+    if isinstance(value, time):
+        return {"time": value.isoformat()}
+    if isinstance(value, timedelta):
+        return {"timedelta": value.total_seconds()}
+    raise TypeError(f"cannot cache {type(value).__name__} cell")
+
+
+def decode_cell(obj):
+    if len(obj) == 1:
+        ((kind, value),) = obj.items()
+        if kind == "datetime":
+            return datetime.fromisoformat(value)
+        if kind == "time":
+            return time.fromisoformat(value)
+        if kind == "timedelta":
+            return timedelta(seconds=value)
+    return obj
 
-def build_report(input_dir, output_path):
-    xlsx_paths = sorted(glob.glob(os.path.join(input_dir, "*.xlsx")))
-    if not xlsx_paths:
-        print(f"No .xlsx files found in {input_dir}", file=sys.stderr)
-        sys.exit(1)
 
-    grouped_main = defaultdict(lambda: {
-        "total_qty": 0.0,
-        "total_cost": 0.0,
-        "ticket_set": set(),
-        "cost_count": 0,
-    })
-    grouped_additional = defaultdict(lambda: {
-        "total_qty": 0.0,
-        "total_cost": 0.0,
-        "ticket_set": set(),
-        "cost_count": 0,
-    })
+def read_cache(path, cache_dir, stamp):
+    # The cache is plain JSON data, never code, and anything that does not
+    # look exactly like what write_cache() stores is treated as a miss.
+    try:
+        with open(cache_path(cache_dir, path), encoding="utf-8") as handle:
+            entry = json.load(handle, object_hook=decode_cell)
+    except (OSError, ValueError, TypeError):
+        return None
+    if not isinstance(entry, dict) or entry.get("stamp") != stamp:
+        return None
+
+    col_indices = entry.get("columns")
+    rows = entry.get("rows")
+    if (
+        not isinstance(col_indices, list)
+        or len(col_indices) != len(REQUIRED_COLUMNS)
+        or any(type(idx) is not int or idx < 0 for idx in col_indices)
+        or not isinstance(rows, list)
+    ):
+        return None
+    width = max(col_indices) + 1
+    if any(type(row) is not list or len(row) != width for row in rows):
+        return None
+    if {type(value) for row in rows for value in row} - CACHE_CELL_TYPES:
+        return None
+    return rows, tuple(col_indices)
 
+
+def write_cache(path, cache_dir, stamp, items, col_indices):
+    cached = cache_path(cache_dir, path)
+    partial_path = f"{cached}.{os.getpid()}.tmp"
+    entry = {"stamp": stamp, "columns": list(col_indices), "rows": items}
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        with open(partial_path, "w", encoding="utf-8") as handle:
+            json.dump(entry, handle, default=encode_cell, separators=(",", ":"))
+        os.replace(partial_path, cached)
+    except (OSError, TypeError, ValueError) as exc:
+        print(f"Could not cache {os.path.basename(path)}: {exc}", file=sys.stderr)
+        with contextlib.suppress(OSError):
+            os.remove(partial_path)
+
+
+def fetch_workbook(path, cache_dir, read_bytes=False):
+    """Return (cached, source, stamp) for one workbook.
+
+    cached holds still-fresh rows from the cache, otherwise None. source is
+    what load_line_items should open: the path, or with read_bytes the whole
+    file already read into memory.
+    """
+    stamp = None
+    if cache_dir is not None:
+        stamp = cache_stamp(path)
+        cached = read_cache(path, cache_dir, stamp)
+        if cached is not None:
+            return cached, None, stamp
+    if not read_bytes:
+        return None, path, stamp
+    with open(path, "rb") as handle:
+        return None, io.BytesIO(handle.read()), stamp
+
+
+def load_fetched(path, cache_dir, fetched):
+    cached, source, stamp = fetched
+    if cached is not None:
+        return cached
+    items, col_indices = load_line_items(path, source)
+    if stamp is not None and col_indices is not None:
+        write_cache(path, cache_dir, stamp, items, col_indices)
+    return items, col_indices
+
+
+def load_line_items_cached(path, cache_dir):
+    # Parsing the XLSX dominates a run, so rows from an unchanged workbook
+    # (same path, mtime and size) are reused from the previous run. Itemgetter
+    # does not care that cached rows come back as lists rather than tuples.
+    return load_fetched(path, cache_dir, fetch_workbook(path, cache_dir))
+
+
+class GroupTotals:
+    """Per-group totals stored column-wise, one slot per group key.
+
+    Keeping the running sums in flat arrays indexed by slot means a row
+    update costs one dict lookup for the key instead of one per field.
+    Keys are (location, level, ...) tuples; the report sort key is built
+    once when a key is first seen rather than on every sort.
+    """
+
+    __slots__ = (
+        "slots",
+        "keys",
+        "sort_keys",
+        "total_qty",
+        "total_cost",
+        "cost_count",
+        "ticket_sets",
+    )
+
+    def __init__(self):
+        self.slots = {}
+        self.keys = []
+        self.sort_keys = []
+        self.total_qty = array("d")
+        self.total_cost = array("d")
+        self.cost_count = array("q")
+        self.ticket_sets = []
+
+    def slot(self, key, sort_key=None):
+        idx = self.slots.get(key)
+        if idx is None:
+            if sort_key is None:
+                sort_key = (cached_level_sort_key(key[1]), key[0]) + key[2:]
+            idx = len(self.keys)
+            self.slots[key] = idx
+            self.keys.append(key)
+            self.sort_keys.append(sort_key)
+            self.total_qty.append(0.0)
+            self.total_cost.append(0.0)
+            self.cost_count.append(0)
+            self.ticket_sets.append(set())
+        return idx
+
+    def add(self, key, qty_value, cost, ticket_no):
+        idx = self.slot(key)
+        self.total_qty[idx] += qty_value
+        if cost is not None:
+            self.total_cost[idx] += cost
+            self.cost_count[idx] += 1
+        if ticket_no:
+            self.ticket_sets[idx].add(ticket_no)
+
+    def merge(self, other):
+        for other_idx, key in enumerate(other.keys):
+            idx = self.slot(key, other.sort_keys[other_idx])
+            self.total_qty[idx] += other.total_qty[other_idx]
+            self.total_cost[idx] += other.total_cost[other_idx]
+            self.cost_count[idx] += other.cost_count[other_idx]
+            self.ticket_sets[idx].update(other.ticket_sets[other_idx])
+
+    def sorted_items(self):
+        order = sorted(range(len(self.keys)), key=self.sort_keys.__getitem__)
+        return [(self.keys[idx], idx) for idx in order]
+
+    def totals(self, idx):
+        total_qty = self.total_qty[idx]
+        total_cost = self.total_cost[idx] if self.cost_count[idx] > 0 else None
+        avg_unit_rate = None
+        if total_cost is not None and total_qty > 0:
+            avg_unit_rate = total_cost / total_qty
+        return len(self.ticket_sets[idx]), total_qty, avg_unit_rate, total_cost
+
+
+def parse_file(path, cache_dir=None):
+    # Runs in a worker process, so everything returned must be picklable.
+    return aggregate_line_items(*load_line_items_cached(path, cache_dir))
+
+
+def parse_files_prefetched(xlsx_paths, cache_dir):
+    # Serial path: a background thread reads the next workbook (or its cache
+    # entry) into memory while this thread parses the current one. File reads
+    # release the GIL, so the read overlaps the parse.
+    with ThreadPoolExecutor(max_workers=1) as prefetch:
+        pending = prefetch.submit(fetch_workbook, xlsx_paths[0], cache_dir, True)
+        for idx, path in enumerate(xlsx_paths):
+            fetched = pending.result()
+            if idx + 1 < len(xlsx_paths):
+                pending = prefetch.submit(
+                    fetch_workbook, xlsx_paths[idx + 1], cache_dir, True
+                )
+            yield aggregate_line_items(*load_fetched(path, cache_dir, fetched))
+
+
+def aggregate_line_items(items, col_indices):
+    grouped_main = GroupTotals()
+    grouped_additional = GroupTotals()
+    counters = dict.fromkeys(COUNTER_NAMES, 0)
+    if col_indices is None:
+        return grouped_main, grouped_additional, counters
+    counters["processed_files"] = 1
+
+    # Rows are always wide enough for every required column, so a single
+    # itemgetter built from this file's header pulls all nine values at once.
+    extract = itemgetter(*col_indices)
+    add_main = grouped_main.add
+    add_additional = grouped_additional.add
+    # The row loop is interpreter-bound: keep helpers and counters in locals
+    # so each row avoids global and dict lookups.
+    norm_text = cached_normalize_text
+    norm_level = cached_normalize_level
+    to_number = parse_number
+    intern = sys.intern
     included_main = 0
     included_additional = 0
     skipped_desc = 0
     skipped_qty = 0
-    processed_files = 0
+    for row in items:
+        (
+            item_value,
+            desc_value,
+            qty_raw,
+            unit_value,
+            rate_raw,
+            cost_raw,
+            loc_value,
+            level_value,
+            ticket_value,
+        ) = extract(row)
+        if item_value is None:
+            continue
 
-    for path in xlsx_paths:
-        items = load_line_items(path)
-        if not items:
+        item_type = norm_text(item_value, "")
+        if not item_type:
             continue
-        processed_files += 1
-        for row, header_map in items:
-            def get_value(name):
-                idx = header_map[name]
-                return row[idx] if idx < len(row) else None
-
-            item_type = normalize_text(get_value("Item Type"), fallback="").strip()
-            if not item_type:
-                continue
 
-            description = normalize_text(get_value("Item Description"), fallback="").strip()
-            if not description:
-                skipped_desc += 1
-                continue
+        description = norm_text(desc_value, "")
+        if not description:
+            skipped_desc += 1
+            continue
 
-            qty_value = parse_number(get_value("Qty Value"))
-            if qty_value is None:
-                skipped_qty += 1
-                continue
+        qty_value = to_number(qty_raw)
+        if qty_value is None:
+            skipped_qty += 1
+            continue
 
-            qty_unit = normalize_text(get_value("Qty Unit"), fallback="Unknown")
-            location = normalize_text(get_value("Location"), fallback="Unknown")
-            level = normalize_level(get_value("Level"))
-            ticket_no = normalize_text(get_value("Ticket No."), fallback="")
-
-            unit_rate = parse_number(get_value("Unit Rate"))
-            cost = parse_number(get_value("Cost"))
-            if cost is not None and cost > 0:
-                computed_cost = cost
-            elif unit_rate is not None:
-                computed_cost = qty_value * unit_rate
-            else:
-                computed_cost = None
+        qty_unit = norm_text(unit_value, "Unknown")
+        location = norm_text(loc_value, "Unknown")
+        level = norm_level(level_value)
+        # Ticket counts must stay exact, so keep the sets but share one string
+        # per ticket across groups; pickle then sends each ticket only once.
+        ticket_no = intern(normalize_text(ticket_value, ""))
+
+        unit_rate = to_number(rate_raw)
+        cost = to_number(cost_raw)
+        if cost is not None and cost > 0:
+            computed_cost = cost
+        elif unit_rate is not None:
+            computed_cost = qty_value * unit_rate
+        else:
+            computed_cost = None
+
+        if item_type == "Mix Customer":
+            add_main(
+                (location, level, description, qty_unit),
+                qty_value,
+                computed_cost,
+                ticket_no,
+            )
+            included_main += 1
+        else:
+            add_additional(
+                (location, level, item_type, description, qty_unit),
+                qty_value,
+                computed_cost,
+                ticket_no,
+            )
+            included_additional += 1
+
+    counters["included_main"] = included_main
+    counters["included_additional"] = included_additional
+    counters["skipped_desc"] = skipped_desc
+    counters["skipped_qty"] = skipped_qty
+    return grouped_main, grouped_additional, counters
+
+
+def report_rows(grouped, item_type=None):
+    # Main Mixes keys leave out the item type, so the caller supplies it;
+    # Additional Mixes keys carry it as their third element.
+    for key, idx in grouped.sorted_items():
+        if item_type is None:
+            location, level, row_item_type, description, qty_unit = key
+        else:
+            location, level, description, qty_unit = key
+            row_item_type = item_type
+        ticket_count, total_qty, avg_unit_rate, total_cost = grouped.totals(idx)
+        yield [
+            level,
+            location,
+            row_item_type,
+            description,
+            ticket_count,
+            f"{total_qty:.2f}",
+            qty_unit,
+            "" if avg_unit_rate is None else f"{avg_unit_rate:.2f}",
+            "" if total_cost is None else f"{total_cost:.2f}",
+        ]
 
-            if item_type == "Mix Customer":
-                key = (location, level, description, qty_unit)
-                agg = grouped_main[key]
-                included_main += 1
-            else:
-                key = (location, level, item_type, description, qty_unit)
-                agg = grouped_additional[key]
-                included_additional += 1
-            agg["total_qty"] += qty_value
-            if computed_cost is not None:
-                agg["total_cost"] += computed_cost
-                agg["cost_count"] += 1
-            if ticket_no:
-                agg["ticket_set"].add(ticket_no)
-
-    with open(output_path, "w", newline="", encoding="utf-8") as handle:
+
+def build_report(input_dir, output_path, jobs=1, cache_dir=None):
+    # Match .xlsx in any case but skip files that are not real workbooks:
+    # "~$" lock files left by an open Excel and dotfiles such as the macOS
+    # "._" AppleDouble files that OneDrive, SMB and exFAT drives leave behind.
+    with os.scandir(input_dir) as entries:
+        xlsx_paths = sorted(
+            entry.path
+            for entry in entries
+            if entry.name.lower().endswith(".xlsx")
+            and not entry.name.startswith(("~$", "."))
+            and entry.is_file()
+        )
+    if not xlsx_paths:
+        print(f"No .xlsx files found in {input_dir}", file=sys.stderr)
+        sys.exit(1)
+
+    grouped_main = GroupTotals()
+    grouped_additional = GroupTotals()
+    counters = dict.fromkeys(COUNTER_NAMES, 0)
+
+    # Workbook parsing dominates the runtime and each file is independent,
+    # so parse them across processes and merge the partial aggregates here.
+    # A single worker is not worth a process; it parses in this process and
+    # prefetches the next workbook on a thread instead.
+    workers = min(jobs, len(xlsx_paths))
+    with contextlib.ExitStack() as stack:
+        if workers > 1:
+            executor = stack.enter_context(ProcessPoolExecutor(max_workers=workers))
+            results = executor.map(parse_file, xlsx_paths, repeat(cache_dir), chunksize=1)
+        else:
+            results = parse_files_prefetched(xlsx_paths, cache_dir)
+        for main_part, additional_part, file_counters in results:
+            grouped_main.merge(main_part)
+            grouped_additional.merge(additional_part)
+            for name, value in file_counters.items():
+                counters[name] += value
+
+    # A large buffer lets the whole report go out in a handful of writes,
+    # which matters when the output lands on a synced OneDrive folder.
+    with open(
+        output_path, "w", newline="", encoding="utf-8", buffering=CSV_BUFFER_SIZE
+    ) as handle:
         writer = csv.writer(handle)
         header = [
             "Level",
@@ -235,67 +862,22 @@ def build_report(input_dir, output_path):
 
         writer.writerow(["Main Mixes"])
         writer.writerow(header)
-        for (location, level, description, qty_unit), agg in sorted(
-            grouped_main.items(),
-            key=lambda item: (
-                level_sort_key(item[0][1]),
-                item[0][0],
-                item[0][2],
-                item[0][3],
-            ),
-        ):
-            total_qty = agg["total_qty"]
-            total_cost = agg["total_cost"] if agg["cost_count"] > 0 else None
-            avg_unit_rate = None
-            if total_cost is not None and total_qty > 0:
-                avg_unit_rate = total_cost / total_qty
-            writer.writerow([
-                level,
-                location,
-                "Mix Customer",
-                description,
-                len(agg["ticket_set"]),
-                format_number(total_qty),
-                qty_unit,
-                format_number(avg_unit_rate),
-                format_number(total_cost),
-            ])
+        writer.writerows(report_rows(grouped_main, item_type="Mix Customer"))
 
         writer.writerow([])
         writer.writerow(["Additional Mixes"])
         writer.writerow(header)
-        for (location, level, item_type, description, qty_unit), agg in sorted(
-            grouped_additional.items(),
-            key=lambda item: (
-                level_sort_key(item[0][1]),
-                item[0][0],
-                item[0][2],
-                item[0][3],
-                item[0][4],
-            ),
-        ):
-            total_qty = agg["total_qty"]
-            total_cost = agg["total_cost"] if agg["cost_count"] > 0 else None
-            avg_unit_rate = None
-            if total_cost is not None and total_qty > 0:
-                avg_unit_rate = total_cost / total_qty
-            writer.writerow([
-                level,
-                location,
-                item_type,
-                description,
-                len(agg["ticket_set"]),
-                format_number(total_qty),
-                qty_unit,
-                format_number(avg_unit_rate),
-                format_number(total_cost),
-            ])
-
-    print(f"Processed files: {processed_files}")
-    print(f"Included rows (Main Mixes): {included_main}")
-    print(f"Included rows (Additional Mixes): {included_additional}")
-    print(f"Skipped rows (blank Item Description): {skipped_desc}")
-    print(f"Skipped rows (non-numeric Qty Value): {skipped_qty}")
+        writer.writerows(report_rows(grouped_additional))
+
+    cached_normalize_text.cache_clear()
+    cached_normalize_level.cache_clear()
+    cached_level_sort_key.cache_clear()
+
+    print(f"Processed files: {counters['processed_files']}")
+    print(f"Included rows (Main Mixes): {counters['included_main']}")
+    print(f"Included rows (Additional Mixes): {counters['included_additional']}")
+    print(f"Skipped rows (blank Item Description): {counters['skipped_desc']}")
+    print(f"Skipped rows (non-numeric Qty Value): {counters['skipped_qty']}")
     print(f"Report written to: {output_path}")
 
 
@@ -311,7 +893,8 @@ def main():
         print(f"Input directory not found: {input_dir}", file=sys.stderr)
         sys.exit(1)
 
-    build_report(input_dir, output_path)
+    cache_dir = None if args.no_cache else default_cache_dir()
+    build_report(input_dir, output_path, jobs=args.jobs, cache_dir=cache_dir)
 
 
 if __name__ == "__main__":
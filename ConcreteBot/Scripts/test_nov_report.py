@@ -0,0 +1,400 @@
+"""Tests for the XLSX reader, cache and report output in nov_report.py.
+
+Run with: python -m unittest discover Scripts
+"""
+
+import argparse
+import contextlib
+import csv
+import io
+import json
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+import zipfile
+from datetime import datetime, time, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import nov_report  # noqa: E402
+
+MAIN_NS = "http://schemas.openxmlformats.org/spreadsheetml/2006/main"
+DOC_REL_NS = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+PKG_REL_NS = "http://schemas.openxmlformats.org/package/2006/relationships"
+
+HEADER_CELLS = "".join(
+    f'<c r="{chr(65 + idx)}1" t="inlineStr"><is><t>{name}</t></is></c>'
+    for idx, name in enumerate(nov_report.REQUIRED_COLUMNS)
+)
+
+
+def rels_xml(*relationships):
+    body = "".join(
+        f'<Relationship Id="{rel_id}" Type="{DOC_REL_NS}/{rel_type}" Target="{target}"/>'
+        for rel_id, rel_type, target in relationships
+    )
+    return f'<Relationships xmlns="{PKG_REL_NS}">{body}</Relationships>'
+
+
+def workbook_xml(sheets, date1904=False):
+    properties = '<workbookPr date1904="1"/>' if date1904 else ""
+    body = "".join(
+        f'<sheet name="{name}" sheetId="{idx}" r:id="{rel_id}"/>'
+        for idx, (name, rel_id) in enumerate(sheets, start=1)
+    )
+    return (
+        f'<workbook xmlns="{MAIN_NS}" xmlns:r="{DOC_REL_NS}">'
+        f"{properties}<sheets>{body}</sheets></workbook>"
+    )
+
+
+def sheet_xml(rows):
+    body = "".join(f'<row r="{idx}">{cells}</row>' for idx, cells in enumerate(rows, 1))
+    return f'<worksheet xmlns="{MAIN_NS}"><sheetData>{body}</sheetData></worksheet>'
+
+
+def line_items_cells(row_idx, values):
+    # values follow REQUIRED_COLUMNS; None leaves the cell out.
+    cells = []
+    for idx, value in enumerate(values):
+        ref = f"{chr(65 + idx)}{row_idx}"
+        if isinstance(value, str):
+            cells.append(f'<c r="{ref}" t="inlineStr"><is><t>{value}</t></is></c>')
+        elif value is not None:
+            cells.append(f'<c r="{ref}"><v>{value}</v></c>')
+    return "".join(cells)
+
+
+PACKAGE_RELS = rels_xml(("rId1", "officeDocument", "xl/workbook.xml"))
+SHEET1_RELS = rels_xml(("rId1", "worksheet", "worksheets/sheet1.xml"))
+
+SHARED_STRINGS = (
+    f'<sst xmlns="{MAIN_NS}">'
+    "<si><t>Mix Customer</t></si>"
+    "<si><r><t>ECOPACT </t></r><r><t>35MPA</t></r>"
+    "<rPh><t>PHONETIC</t></rPh></si>"
+    "</sst>"
+)
+
+STYLES = (
+    f'<styleSheet xmlns="{MAIN_NS}">'
+    '<numFmts><numFmt numFmtId="164" formatCode="[h]:mm"/></numFmts>'
+    '<cellXfs><xf numFmtId="0"/><xf numFmtId="14"/><xf numFmtId="164"/>'
+    '<xf numFmtId="21"/></cellXfs>'
+    "</styleSheet>"
+)
+
+
+class WorkbookTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+
+    def write_xlsx(self, parts):
+        path = os.path.join(self.tmp.name, f"book{len(os.listdir(self.tmp.name))}.xlsx")
+        with zipfile.ZipFile(path, "w") as archive:
+            for name, data in parts.items():
+                archive.writestr(name, data)
+        return path
+
+    def write_line_items(self, rows):
+        # The first data row has no Item Description and a date-styled Level,
+        # so it exercises date round-tripping and the skipped_desc counter.
+        undescribed = (
+            '<c r="A2" t="inlineStr"><is><t>Mix Customer</t></is></c>'
+            '<c r="C2"><v>7.5</v></c><c r="H2" s="1"><v>45964</v></c>'
+        )
+        data = [line_items_cells(idx, row) for idx, row in enumerate(rows, start=3)]
+        return self.write_xlsx({
+            "_rels/.rels": PACKAGE_RELS,
+            "xl/workbook.xml": workbook_xml([("LineItems", "rId1")]),
+            "xl/_rels/workbook.xml.rels": rels_xml(
+                ("rId1", "worksheet", "worksheets/sheet1.xml"),
+                ("rId2", "styles", "styles.xml"),
+            ),
+            "xl/worksheets/sheet1.xml": sheet_xml([HEADER_CELLS, undescribed, *data]),
+            "xl/styles.xml": STYLES,
+        })
+
+
+class ReaderTests(WorkbookTestCase):
+    def read_rows(self, path):
+        with zipfile.ZipFile(path) as archive:
+            sheet_path, strings_part, styles_part, epoch = nov_report.find_workbook_parts(
+                archive, nov_report.LINE_ITEMS_SHEET
+            )
+            shared_strings = nov_report.load_shared_strings(archive, strings_part)
+            date_styles = nov_report.load_date_styles(archive, styles_part, epoch)
+            return list(
+                nov_report.iter_sheet_rows(archive, sheet_path, shared_strings, date_styles)
+            )
+
+    def test_cell_types(self):
+        cells = (
+            '<c r="A1" t="s"><v>0</v></c>'
+            '<c r="B1" t="s"><v>1</v></c>'
+            '<c r="C1" t="inlineStr"><is><t>inline</t></is></c>'
+            '<c r="D1" t="b"><v>1</v></c>'
+            '<c r="E1" t="str"><f>A1</f><v>formula text</v></c>'
+            '<c r="F1" t="e"><v>#N/A</v></c>'
+            '<c r="G1"><v>12</v></c>'
+            '<c r="H1"><v>2.5</v></c>'
+            '<c r="I1" s="1"><v>45964</v></c>'
+            '<c r="J1" s="2"><v>1.25</v></c>'
+            '<c r="K1" s="3"><v>0.5</v></c>'
+            '<c r="L1"><f>1+1</f></c>'
+        )
+        path = self.write_xlsx({
+            "_rels/.rels": PACKAGE_RELS,
+            "xl/workbook.xml": workbook_xml([("LineItems", "rId1")]),
+            "xl/_rels/workbook.xml.rels": rels_xml(
+                ("rId1", "worksheet", "/xl/worksheets/items.xml"),
+                ("rId2", "sharedStrings", "sharedStrings.xml"),
+                ("rId3", "styles", "styles.xml"),
+            ),
+            "xl/worksheets/items.xml": sheet_xml([cells]),
+            "xl/sharedStrings.xml": SHARED_STRINGS,
+            "xl/styles.xml": STYLES,
+        })
+
+        self.assertEqual(
+            self.read_rows(path),
+            [(
+                "Mix Customer",
+                "ECOPACT 35MPA",
+                "inline",
+                True,
+                "formula text",
+                "#N/A",
+                12,
+                2.5,
+                datetime(2025, 11, 3),
+                timedelta(hours=30),
+                time(12, 0),
+                None,
+            )],
+        )
+
+    def test_cells_without_references_follow_the_previous_cell(self):
+        cells = '<c r="B1"><v>1</v></c><c><v>2</v></c><c r="E1"><v>3</v></c><c><v>4</v></c>'
+        path = self.write_xlsx({
+            "_rels/.rels": PACKAGE_RELS,
+            "xl/workbook.xml": workbook_xml([("LineItems", "rId1")]),
+            "xl/_rels/workbook.xml.rels": SHEET1_RELS,
+            "xl/worksheets/sheet1.xml": sheet_xml([cells]),
+        })
+
+        self.assertEqual(self.read_rows(path), [(None, 1, 2, None, 3, 4)])
+
+    def test_workbook_part_is_found_through_package_relationships(self):
+        path = self.write_xlsx({
+            "_rels/.rels": rels_xml(("rId1", "officeDocument", "book/main.xml")),
+            "book/main.xml": workbook_xml([("Summary", "rId1"), ("LineItems", "rId2")], True),
+            "book/_rels/main.xml.rels": rels_xml(
+                ("rId1", "worksheet", "sheets/summary.xml"),
+                ("rId2", "worksheet", "sheets/items.xml"),
+                ("rId3", "styles", "../shared/styles.xml"),
+            ),
+            "book/sheets/summary.xml": sheet_xml(['<c r="A1"><v>0</v></c>']),
+            "book/sheets/items.xml": sheet_xml(['<c r="A1" s="1"><v>1</v></c>']),
+            "shared/styles.xml": STYLES,
+        })
+
+        self.assertEqual(self.read_rows(path), [(datetime(1904, 1, 2),)])
+
+    def test_load_line_items_reads_required_columns(self):
+        row = (
+            '<c r="A2" t="inlineStr"><is><t>Mix Customer</t></is></c>'
+            '<c r="C2"><v>7.5</v></c><c r="H2"><v>5</v></c>'
+        )
+        path = self.write_xlsx({
+            "_rels/.rels": PACKAGE_RELS,
+            "xl/workbook.xml": workbook_xml([("LineItems", "rId1")]),
+            "xl/_rels/workbook.xml.rels": SHEET1_RELS,
+            "xl/worksheets/sheet1.xml": sheet_xml([HEADER_CELLS, row, ""]),
+        })
+
+        items, col_indices = nov_report.load_line_items(path)
+
+        self.assertEqual(col_indices, tuple(range(len(nov_report.REQUIRED_COLUMNS))))
+        self.assertEqual(
+            items, [("Mix Customer", None, 7.5, None, None, None, None, 5, None)]
+        )
+
+    def test_missing_workbook_part_is_skipped(self):
+        path = self.write_xlsx({
+            "_rels/.rels": PACKAGE_RELS,
+        })
+
+        stderr = io.StringIO()
+        with contextlib.redirect_stderr(stderr):
+            result = nov_report.load_line_items(path)
+
+        self.assertEqual(result, ([], None))
+        self.assertIn("unreadable workbook", stderr.getvalue())
+
+
+class CacheTests(WorkbookTestCase):
+    def setUp(self):
+        super().setUp()
+        self.cache_dir = os.path.join(self.tmp.name, "cache")
+        self.path = self.write_line_items([
+            ("Mix Customer", "ECOPACT 35MPA", 7.5, "m3", 210, None, "Podium", "P1", "T1"),
+            ("Pump", "Boom pump", 2, "hr", None, 300, "Tower", "L2", "T2"),
+        ])
+        self.expected = nov_report.load_line_items(self.path)
+
+    def cache_files(self):
+        return os.listdir(self.cache_dir)
+
+    def test_cached_rows_round_trip(self):
+        nov_report.load_line_items_cached(self.path, self.cache_dir)
+        items, col_indices = nov_report.load_line_items_cached(self.path, self.cache_dir)
+
+        self.assertEqual(col_indices, self.expected[1])
+        self.assertEqual([tuple(row) for row in items], self.expected[0])
+        self.assertIsInstance(items[0][7], datetime)
+
+    def test_changed_workbook_overwrites_its_entry(self):
+        nov_report.load_line_items_cached(self.path, self.cache_dir)
+        stat = os.stat(self.path)
+        os.utime(self.path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+        nov_report.load_line_items_cached(self.path, self.cache_dir)
+
+        self.assertEqual(len(self.cache_files()), 1)
+
+    def test_malformed_entries_fall_back_to_parsing(self):
+        nov_report.load_line_items_cached(self.path, self.cache_dir)
+        (name,) = self.cache_files()
+        entry_path = os.path.join(self.cache_dir, name)
+        with open(entry_path, encoding="utf-8") as handle:
+            entry = json.load(handle)
+        short_rows = dict(entry, rows=[row[:2] for row in entry["rows"]])
+        odd_cells = dict(entry, rows=[[{"x": 1}] * len(row) for row in entry["rows"]])
+
+        for contents in (b"\x80\x04K\x00.", json.dumps(short_rows).encode(),
+                         json.dumps(odd_cells).encode(), b'{"stamp": 1}'):
+            with open(entry_path, "wb") as handle:
+                handle.write(contents)
+            items, col_indices = nov_report.load_line_items_cached(self.path, self.cache_dir)
+            self.assertEqual(col_indices, self.expected[1])
+            self.assertEqual([tuple(row) for row in items], self.expected[0])
+
+    def test_prefetched_parse_matches_direct_parse(self):
+        paths = [
+            self.path,
+            self.write_line_items([
+                ("Mix Customer", "ECOPACT 35MPA", 2.5, "m3", 230, None, "Podium", "P1", "T3"),
+                ("Pump", "Line pump", 1, "hr", 150, None, "Tower", "L3", "T4"),
+            ]),
+        ]
+        expected = self.summarize(nov_report.parse_file(path) for path in paths)
+        self.assertEqual(len(expected[0][0]), 1)
+        self.assertEqual(len(expected[0][1]), 1)
+        for cache_dir in (None, self.cache_dir, self.cache_dir):
+            results = nov_report.parse_files_prefetched(paths, cache_dir)
+            self.assertEqual(self.summarize(results), expected)
+
+    @staticmethod
+    def summarize(results):
+        return [
+            (
+                list(nov_report.report_rows(main, item_type="Mix Customer")),
+                list(nov_report.report_rows(additional)),
+                counters,
+            )
+            for main, additional, counters in results
+        ]
+
+
+class ReportTests(WorkbookTestCase):
+    def setUp(self):
+        super().setUp()
+        self.write_line_items([
+            ("Mix Customer", "35MPA", 4, "m3", 200, None, "Podium", 2, "T1"),
+            ("Mix Customer", "35MPA", 6, "m3", 250, None, "Podium", 2, "T2"),
+            ("Pump", "Boom pump", 3, "hr", None, None, "Tower", "L1", "T3"),
+            ("Mix Customer", "25MPA", 5, "m3", None, 1000, "Tower", 10, "T4"),
+            ("Mix Customer", "30MPA", "n/a", "m3", 200, None, "Tower", 10, "T4"),
+        ])
+        self.write_line_items([
+            ("Mix Customer", "35MPA", 10, "m3", 230, None, "Podium", 2, "T1"),
+            ("Mix Customer", "40MPA", 1, "m3", 300, None, "Podium", "B1", "T6"),
+            ("Pump", "Boom pump", 2, "hr", None, 240, "Tower", "L1", "T5"),
+            ("Washout", "Truck washout", 1, "ea", None, None, "Podium", 2, None),
+        ])
+        self.input_dir = self.tmp.name
+        self.out_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.out_dir.cleanup)
+
+    def run_report(self, jobs, cache_dir):
+        output_path = os.path.join(self.out_dir.name, "report.csv")
+        stdout = io.StringIO()
+        with contextlib.redirect_stdout(stdout):
+            nov_report.build_report(self.input_dir, output_path, jobs, cache_dir)
+        with open(output_path, newline="", encoding="utf-8") as handle:
+            return list(csv.reader(handle)), stdout.getvalue()
+
+    def test_report_is_the_same_serially_in_parallel_and_cached(self):
+        header = [
+            "Level", "Location", "Item Type", "Mix Description", "Ticket Count",
+            "Total Qty", "Qty Unit", "Unit Rate", "Total Cost",
+        ]
+        # Levels sort numerically before text, costs fall back to qty *
+        # rate, and Unit Rate is total cost over total qty.
+        expected = [
+            ["Main Mixes"],
+            header,
+            ["2", "Podium", "Mix Customer", "35MPA", "2", "20.00", "m3", "230.00", "4600.00"],
+            ["10", "Tower", "Mix Customer", "25MPA", "1", "5.00", "m3", "200.00", "1000.00"],
+            ["B1", "Podium", "Mix Customer", "40MPA", "1", "1.00", "m3", "300.00", "300.00"],
+            [],
+            ["Additional Mixes"],
+            header,
+            ["2", "Podium", "Washout", "Truck washout", "0", "1.00", "ea", "", ""],
+            ["L1", "Tower", "Pump", "Boom pump", "2", "5.00", "hr", "48.00", "240.00"],
+        ]
+        cache_dir = os.path.join(self.out_dir.name, "cache")
+        for jobs, run_cache_dir in ((1, None), (2, None), (1, cache_dir), (2, cache_dir)):
+            with self.subTest(jobs=jobs, cache_dir=run_cache_dir):
+                rows, stdout = self.run_report(jobs, run_cache_dir)
+                self.assertEqual(rows, expected)
+                for line in (
+                    "Processed files: 2",
+                    "Included rows (Main Mixes): 5",
+                    "Included rows (Additional Mixes): 3",
+                    "Skipped rows (blank Item Description): 2",
+                    "Skipped rows (non-numeric Qty Value): 1",
+                ):
+                    self.assertIn(line, stdout)
+        self.assertEqual(len(os.listdir(cache_dir)), 2)
+
+
+    def test_listing_skips_lock_files_dotfiles_and_directories(self):
+        shutil.copy(
+            os.path.join(self.input_dir, "book0.xlsx"),
+            os.path.join(self.input_dir, "Nov.XLSX"),
+        )
+        for name in ("~$Nov.xlsx", "._Nov.xlsx"):
+            with open(os.path.join(self.input_dir, name), "wb") as handle:
+                handle.write(b"\x00\x05\x16\x07 not a workbook")
+        os.mkdir(os.path.join(self.input_dir, "x.xlsx"))
+
+        _, stdout = self.run_report(1, None)
+
+        self.assertIn("Processed files: 3", stdout)
+        self.assertIn("Included rows (Main Mixes): 8", stdout)
+
+
+class ArgumentTests(unittest.TestCase):
+    def test_jobs_must_be_positive(self):
+        for text in ("0", "-1"):
+            with self.assertRaises(argparse.ArgumentTypeError):
+                nov_report.positive_int(text)
+        self.assertEqual(nov_report.positive_int("2"), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()